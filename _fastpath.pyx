@@ -0,0 +1,30 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+# 🔹 Compiled versions of the per-chunk helpers in soundreaderfinal.py (same results, no interpreter overhead)
+# subsample is only used when Numba is missing: with Numba, _find_events_nb subsamples and thresholds in one pass.
+# Build in place with: cythonize -i _fastpath.pyx
+import numpy as np
+
+cpdef str seconds_to_hms(double seconds):
+    """Converts seconds into HH:MM:SS format."""
+    cdef long long total = <long long>seconds
+    return f"{total // 3600:02d}:{(total % 3600) // 60:02d}:{total % 60:02d}"
+
+cpdef object subsample(const float[:] frame, int scale_factor):
+    """Reduces frame data to improve efficiency by downsampling."""
+    cdef Py_ssize_t n = frame.shape[0]
+    cdef Py_ssize_t out_len = (n + scale_factor - 1) // scale_factor
+    out = np.empty(out_len, dtype=np.float32)
+    cdef float[:] out_view = out
+    cdef Py_ssize_t i, j, start, end
+    cdef float m
+
+    for i in range(out_len):
+        start = i * scale_factor
+        end = min(start + scale_factor, n)
+        m = frame[start]
+        for j in range(start + 1, end):
+            if frame[j] > m or frame[j] != frame[j]:  # ✅ NaN propagates like np.maximum.reduceat
+                m = frame[j]
+        out_view[i] = m
+
+    return out
@@ -0,0 +1,15 @@
+import argparse
+import os
+
+from onnxruntime.quantization import quantize_dynamic, QuantType
+
+# 🔹 One-off helper: quantizes the detection model to int8 so soundreaderfinal.py can load it instead
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Quantizes the ONNX model weights to int8')
+    parser.add_argument('--model', metavar='m', type=str, help='Path to ONNX model', default="bdetectionmodel_05_01_23.onnx")
+    args = parser.parse_args()
+
+    output = os.path.splitext(args.model)[0] + ".int8.onnx"  # ✅ Same name soundreaderfinal.py looks for
+    print(f"🔹 Quantizing {args.model}...")
+    quantize_dynamic(args.model, output, weight_type=QuantType.QInt8)
+    print(f"✅ Quantized model saved to {output}")
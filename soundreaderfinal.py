@@ -13,13 +13,62 @@ import datetime
 import sys
 import csv
 import re
-import gc
 import shutil
+import atexit
+import queue
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
 from typing import List, Optional
 
-sample_rate = 32000
+try:
+    from numba import njit  # Optional: compiles the numeric helpers when available
+except ImportError:
+    njit = None
 
-global processing_batch, skipped_videos, existing_files_used, new_videos, videos_inferenced, skip_all, use_existing_all, log_precheck_results  # Ensure we use the global variable
+sample_rate = 32000
+_INV_32768 = np.float32(1.0 / 32768.0)  # ✅ int16 PCM -> [-1, 1) float32 scale factor
+PREFETCH_BLOCKS = 2  # ✅ Decoded blocks allowed to wait for inference
+_TIKTOK_ACCOUNT_RE = re.compile(r"tiktok\.com/@([^/?]+)")
+_ID_EXTRACT_RE = re.compile(r"watch\?v=([\w-]+)")
+_SHORTS, _WATCH = "/shorts/", "/watch?v="
+_URL_KIND_RE = re.compile(
+    r"(?P<youtube>youtube\.com|youtu\.be)"
+    r"|(?P<tiktok>tiktok\.com/.*/video/)"
+    r"|(?P<twitch>twitch\.tv/videos/|clips\.twitch\.tv/)"
+    r"|(?P<soop>soop\.live|vod\.sooplive\.co\.kr)"
+)
+# What the first command-line target is: a single video/file, or a source that expands into a batch
+_SOURCE_KIND_RE = re.compile(
+    r"(?P<tiktok_video>tiktok\.com/.*/video/)"
+    r"|(?P<tiktok_channel>tiktok\.com/@)"
+    r"|(?P<txt>\.txt$)"
+    r"|(?P<playlist>youtube\.com/playlist\?|&list=)"
+    r"|(?P<channel>youtube\.com/(?:@|c/|user/|channel/))"
+)
+_BATCH_SOURCES = frozenset({"tiktok_channel", "txt", "playlist", "channel"})
+
+global processing_batch, batch_rerun, skipped_videos, existing_files_used, new_videos, videos_inferenced, skip_all, use_existing_all, log_precheck_results  # Ensure we use the global variable
+
+def extract_video_id(url):
+    """Returns the interned YouTube video ID from a watch URL (the URL itself if it has no watch?v=)."""
+    match = _ID_EXTRACT_RE.search(url)
+    return sys.intern(match.group(1)) if match else url
+
+def to_watch_url(url):
+    """Rewrites a YouTube Shorts URL into its regular watch?v= form (other URLs are returned unchanged)."""
+    return url.replace(_SHORTS, _WATCH)
+
+def classify_source(target):
+    """Classifies the first command-line target as one of the _SOURCE_KIND_RE groups, or 'single'."""
+    match = _SOURCE_KIND_RE.search(target)
+    return match.lastgroup if match else "single"
+
+def classify_url(url):
+    """Classifies a URL once as 'youtube', 'tiktok', 'twitch', 'soop' or 'local' (anything else is a local file)."""
+    match = _URL_KIND_RE.search(url)
+    return match.lastgroup if match else "local"
 
 def check_dependencies():
     """Ensures all required dependencies are installed before execution."""
@@ -46,6 +95,31 @@ def check_dependencies():
         print("\n⚠️ If FFmpeg is missing, install it from: https://ffmpeg.org/download.html")
         sys.exit(1)  # Stop execution
 
+_LOG_CACHE = None  # url -> {"farts": bool, "burps": bool}, loaded once from the CSV log
+
+def _update_log_entry(cache, youtube_url, focus_idx):
+    """Records a processed focus_idx for a URL in the in-memory log cache."""
+    entry = cache.setdefault(youtube_url, {"farts": False, "burps": False})
+    if focus_idx == "60":
+        entry["farts"] = True
+    elif focus_idx == "58":
+        entry["burps"] = True
+
+def _load_log_cache(log_file="inference_log.csv"):
+    """Reads the log file once and keeps the processed URLs in memory for O(1) lookups."""
+    global _LOG_CACHE
+    if _LOG_CACHE is not None:
+        return _LOG_CACHE
+
+    _flush_log()  # ✅ Make buffered rows visible before reading
+    _LOG_CACHE = {}
+    if os.path.exists(log_file):
+        with open(log_file, "r", newline="", encoding="utf-8") as f:
+            for row in csv.reader(f):
+                if row:
+                    _update_log_entry(_LOG_CACHE, row[0], row[1] if len(row) > 1 else None)
+    return _LOG_CACHE
+
 #Pre-Check Log Function - Checks if YouTube URLs extracted from Playlist/Channel have already been processed
 def precheck_log_for_urls(url_list, log_file="inference_log.csv"):
     """Pre-checks the log file for all extracted YouTube URLs to optimize batch processing."""
@@ -55,77 +129,208 @@ def precheck_log_for_urls(url_list, log_file="inference_log.csv"):
         print("🟡 Log file not found. No previous processing detected.")
         return log_results  # ✅ No log means no previous processing.
 
-    #print("\n🟢 Debugging Log Pre-Check:")
-    #print(f"📜 Extracted Playlist URLs: {len(url_list)}")  
-    #print("🔍 Checking log file entries...")  
-
-    with open(log_file, "r", newline="", encoding="utf-8") as f:
-        reader = csv.reader(f)
-        for row in reader:
-            if row and row[0] in url_list:  # ✅ Only count videos that exist in the extracted playlist
-                video_id = row[0].split("watch?v=")[-1]  # ✅ Extract Video ID
-                if video_id not in log_results:
-                    log_results[video_id] = {"farts": False, "burps": False}
-                if row[1] == "60":
-                    log_results[video_id]["farts"] = True
-                elif row[1] == "58":
-                    log_results[video_id]["burps"] = True
-
-                #print(f"   - ✅ Matched: {video_id} (Present in Playlist & Log)")
-
-    #print(f"🟡 Total Processed Videos Found in Log: {len(log_results)}\n")  
+    log_cache = _load_log_cache(log_file)
+    for url in url_list:
+        entry = log_cache.get(url)
+        if entry is not None:  # ✅ Only count videos that exist in the extracted playlist
+            video_id = extract_video_id(url)  # ✅ Extract Video ID
+            log_results[video_id] = (entry["farts"], entry["burps"])  # ✅ (farts, burps)
+
     return log_results
 
 #Check Log Function - Checks if a YouTube URL has already been downloaded+inferenced or not
 def check_log(youtube_url, log_file="inference_log.csv"):
     """Checks if the YouTube URL exists in the log and returns which focus_idx values were processed."""
-    if not os.path.exists(log_file):
-        return False, False  # ✅ No log means no previous processing.
-
-    processed_farts = False
-    processed_burps = False
-
-    with open(log_file, "r", newline="", encoding="utf-8") as f:
-        reader = csv.reader(f)
-                                              
-        for row in reader:
-            if row and row[0] == youtube_url:  # ✅ First column contains URL
-                if row[1] == "60":
-                    processed_farts = True
-                elif row[1] == "58":
-                    processed_burps = True
-
-    return processed_farts, processed_burps
+    entry = _load_log_cache(log_file).get(youtube_url)
+    if entry is None:
+        return False, False  # ✅ No log entry means no previous processing.
+
+    return entry["farts"], entry["burps"]
+
+# Matches the "%(title)s [%(id)s].%(ext)s" naming used by every download function
+_ID_RE = re.compile(r'\[([^\[\]]+)\]\.(opus|m4a|mp3|mp4)$')
+_ID_SUFFIXES = ("].opus", "].m4a", "].mp3", "].mp4")
+
+def index_existing_files(directory="."):
+    """Scans the directory once and maps each video ID to its audio files by extension."""
+    index = {}
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name = entry.name
+            if not name.endswith(_ID_SUFFIXES):  # ✅ Cheap suffix test skips the regex for unrelated files
+                continue
+            match = _ID_RE.search(name)
+            if match:
+                index.setdefault(sys.intern(match.group(1)), {})["." + match.group(2)] = name
+    return index
+
+def find_existing_file(video_id, possible_extensions, index=None):
+    """Returns the existing file for a video ID, honouring the extension preference order."""
+    if not video_id:
+        return None
+    if index is None:
+        index = index_existing_files()
+
+    files = index.get(video_id)
+    if not files:
+        return None
+    for ext in possible_extensions:
+        if ext in files:
+            return files[ext]
+    return None
 
 #Pre-Check Files based on Video IDs - When processing URL batch, it pre-check if files exist
 def precheck_files_for_urls(url_list):
     """Pre-checks if audio files for extracted YouTube URLs already exist."""
     file_results = {}
     possible_extensions = ['.opus', '.m4a', '.mp3', '.mp4']
-    
+    index = index_existing_files()  # ✅ Single directory scan for the whole batch
+
     for url in url_list:
-        video_id = url.split("watch?v=")[-1]  # ✅ Extract video ID correctly
-
-        for ext in possible_extensions:
-            for file in os.listdir("."):
-                if video_id in file and file.endswith(ext):  # ✅ Match video ID with filename
-                    file_results[video_id] = file
-                    break  # ✅ Stop searching once found
-            if video_id in file_results:  
-                break  # ✅ Move to the next URL if a match was found
+        video_id = extract_video_id(url)  # ✅ Extract video ID correctly
+        existing_file = find_existing_file(video_id, possible_extensions, index)
+        if existing_file:
+            file_results[video_id] = existing_file
     return file_results
 
-def log_inference(youtube_url, focus_idx, video_title, log_file="inference_log.csv"):
-    """Logs the YouTube URL, focus_idx, timestamp, and video title after inference."""
-    if not youtube_url.startswith("http") or "tiktok.com" in youtube_url:  # ✅ Skip logging if it's a local file
+def resolve_urls_to_process(urls):
+    """Pre-checks the log and existing files for a batch of YouTube URLs, shows a summary, asks the user
+    how to handle mismatches, and returns (urls_to_process, process_logged_missing)."""
+    global log_precheck_results, file_precheck_results  # ✅ Read by download_audio for every video in the batch
+    process_logged_missing = None  # ✅ Ensure it’s always defined
+
+    # ✅ Pre-check log for these URLs
+    log_precheck_results = precheck_log_for_urls(urls)
+            
+    # ✅ Pre-check file existence
+    file_precheck_results = precheck_files_for_urls(urls)
+    log_set = frozenset(log_precheck_results)
+    file_set = frozenset(file_precheck_results)
+
+    # ✅ Step 3: Show Pre-Processing Summary BEFORE processing
+    # ✅ Find IDs that are in log but missing from file checks
+    logged_but_missing_files = len(log_set - file_set)
+    # ✅ Find IDs that exist as files but have no corresponding log entry
+    existing_but_not_logged = len(file_set - log_set)
+    videos_to_process = max(len(urls) - len(log_precheck_results), 0)  # Ensure non-negative
+
+    # ✅ Filter URLs to process only required videos
+    urls_to_process = []
+
+    print("\n📊 Summary Before Processing:")
+    print(f"   🎥 Total videos extracted: {len(urls)}")
+    print(f"   🔍 Videos already processed (found in log): {len(log_precheck_results)}")
+    print(f"   ✅ Existing files found: {len(file_precheck_results)}")
+    print(f"   🔴 Logged videos with missing files: {logged_but_missing_files}")  # NEW
+    print(f"   🟡 Existing files not found in log: {existing_but_not_logged}")  # NEW
+    print(f"   🔄 Videos requiring download & processing: {videos_to_process}")
+
+    # ✅ If ALL videos are logged AND ALL files exist, prompt for re-inference instead of re-processing
+    if len(log_precheck_results) == len(urls) and len(file_precheck_results) == len(urls):
+        print("✅ No new videos require downloading, but all extracted videos are fully processed and still exist.")
+                
+        user_input = input("Do you want to re-run inference for all videos? (Y/N): ").strip().lower()
+                
+        if user_input == 'y':  # ✅ Re-run all videos
+            print("🔄 Re-running inference for all extracted videos.")
+            urls_to_process = urls  # ✅ Reset file list to process all
+        else:  # ✅ Exit normally
+            print("⏹️ Process terminated by user.")
+            sys.exit(0)
+
+    # ✅ Ask user if they want to continue if mismatches exist
+    elif len(log_precheck_results) > 0 and (logged_but_missing_files > 0 or existing_but_not_logged > 0 or videos_to_process != len(urls)):
+        print("\n⚠️ Warning: There are inconsistencies between the log and existing files.")
+        user_decision = input("Would you like to:\n"
+                              "(Y) Re-download only missing files (Logged videos with missing files)\n"
+                              "(N) Skip missing files that have been inferenced and process only new ones (Videos requiring download & processing) \n"
+                              "(A) Process all videos (Total videos extracted)\n"
+                              "(E) Exit script\n"
+                              "Enter choice (Y/N/A/E): ").strip().lower()
+
+        if user_decision == 'n':
+            print("⏭️ Skipping re-downloading missing files and only processing new videos.")
+            process_logged_missing = False
+                    
+            # ✅ Check if there are actually any new videos to process; exit if none exist
+            if videos_to_process == 0:
+                print("✅ No new videos requiring download. Exiting script.")
+                sys.exit(0)  # ✅ Prevents unnecessary processing
+        elif user_decision == 'y':
+            print("🔄 Re-downloading only missing files.")
+            process_logged_missing = True
+                    
+            # ✅ If no videos are logged, exit!
+            if len(log_precheck_results) == 0 or logged_but_missing_files == 0:
+                print("✅ No new videos requiring download. Exiting script.")
+                sys.exit(0)  # ✅ Prevents unnecessary processing
+        elif user_decision == 'a':
+            print("🔄 Processing all extracted videos (new + missing + existing).")
+            process_logged_missing = "all"
+        elif user_decision == 'e':
+            print("⏹️ Process terminated by user.")
+            exit()
+        else:
+            print("⚠️ Invalid input. Defaulting to skipping re-download.")
+            process_logged_missing = False
+                    
+    video_ids = [extract_video_id(url) for url in urls]
+    for url, video_id in zip(urls, video_ids):
+        log_entry_exists = video_id in log_set
+        file_exists = video_id in file_set
+
+        # ✅ If 'A' (All) was chosen, process all videos
+        if process_logged_missing == "all":
+            urls_to_process.append(url)
+
+        # ✅ If 'Y' (Re-download missing files), process only logged but missing files
+        elif process_logged_missing == True and log_entry_exists and not file_exists and logged_but_missing_files > 0:
+            urls_to_process.append(url)
+
+        # ✅ If 'N' (Skip missing files), process only new unlogged videos
+        elif not process_logged_missing and not log_entry_exists:
+            urls_to_process.append(url)
+
+        # ✅ If files exist but aren't logged, ask user (Handled later in existing checks)
+        elif not log_entry_exists and file_exists:
+            urls_to_process.append(url)
+            
+    print(f"\n🎯 Filtered videos to process: {len(urls_to_process)} out of {len(urls)}")
+
+    return urls_to_process, process_logged_missing
+
+LOG_FLUSH_EVERY = 32  # ✅ Bounds how many log rows can be lost if the process is killed
+_log_handles = {}  # log_file -> [file handle, csv writer, rows written since last flush]
+
+def _flush_log():
+    """Flushes every buffered inference log to disk."""
+    for handle in _log_handles.values():
+        handle[0].flush()
+        handle[2] = 0
+
+atexit.register(_flush_log)
+
+def log_inference(youtube_url, focus_idx_values, video_title, kind, log_file="inference_log.csv"):
+    """Logs the YouTube URL, each processed focus_idx, timestamp, and video title after inference (one call per video)."""
+    if kind in ("local", "tiktok"):  # ✅ Skip logging if it's a local file (or a TikTok video)
         return  
 
     timestamp = datetime.datetime.now().strftime("%d/%m/%Y_%H:%M:%S")
 
-    # ✅ Append the entry to the CSV file
-    with open(log_file, "a", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([youtube_url, focus_idx, timestamp, video_title])
+    # ✅ Keep the CSV open for the whole run instead of reopening it for every row
+    handle = _log_handles.get(log_file)
+    if handle is None:
+        f = open(log_file, "a", newline="", encoding="utf-8", buffering=65536)
+        handle = _log_handles[log_file] = [f, csv.writer(f), 0]
+
+    # ✅ Same one-row-per-focus_idx format as before, so existing logs and readers keep working
+    handle[1].writerows([youtube_url, focus_idx, timestamp, video_title] for focus_idx in focus_idx_values)
+    if _LOG_CACHE is not None:
+        for focus_idx in focus_idx_values:
+            _update_log_entry(_LOG_CACHE, youtube_url, str(focus_idx))  # ✅ Keep lookups in sync without re-reading
+    handle[2] += len(focus_idx_values)
+    if handle[2] >= LOG_FLUSH_EVERY:
+        _flush_log()
 
 def extract_playlist_urls(playlist_url, cookies=None):
     """Extracts all video URLs from a YouTube playlist."""
@@ -164,10 +369,11 @@ def extract_channel_videos(channel_url, cookies=None):
     with yt_dlp.YoutubeDL(options) as ydl:
         try:
             info_dict = ydl.extract_info(channel_url, download=False)
-            urls = [
-                entry["url"].replace("/shorts/", "/watch?v=")  # ✅ Ensure Shorts URLs are converted
-                for entry in info_dict.get("entries", []) if "url" in entry
-            ]
+            # ✅ dict.fromkeys drops repeated entries (common in channel feeds) while keeping upload order
+            urls = list(dict.fromkeys(
+                to_watch_url(entry["url"])  # ✅ Ensure Shorts URLs are converted
+                for entry in info_dict.get("entries", ()) if "url" in entry
+            ))
 
             if not urls:
                 print("⚠️ No video URLs found in this channel.")
@@ -185,7 +391,7 @@ def extract_tiktok_videos(account_url, cookies=None):
     print(f"📜 Extracting video URLs from TikTok account: {account_url}...")
 
     # ✅ Extract the account name (e.g., @vitinlove)
-    match = re.search(r"tiktok\.com/@([^/?]+)", account_url)
+    match = _TIKTOK_ACCOUNT_RE.search(account_url)
     account_name = match.group(1) if match else "Unknown"
 
     output_file = f"TikTokURLs - @{account_name}.txt"  # ✅ Updated filename format
@@ -220,9 +426,46 @@ def extract_tiktok_videos(account_url, cookies=None):
 
     return []
 use_existing_all = False  # ✅ Track if user wants to always use existing files
+_batch_lock = threading.Lock()  # ✅ Guards the new_videos counter updated by download workers
+
+_ydl_local = threading.local()  # Per-thread YoutubeDL instances (they are not thread-safe)
+
+@contextmanager
+def metadata_ydl(name, cookies, options):
+    """Yields a YoutubeDL for metadata lookups of kind `name` (reused per thread unless cookies are given)."""
+    if cookies:
+        with yt_dlp.YoutubeDL(options) as ydl:
+            yield ydl
+        return
+
+    instances = getattr(_ydl_local, "instances", None)
+    if instances is None:
+        instances = _ydl_local.instances = {}
+    ydl = instances.get(name)
+    if ydl is None:
+        ydl = instances[name] = yt_dlp.YoutubeDL(options)
+    yield ydl
+
+_stop_downloads = threading.Event()  # ✅ Set when the main loop exits so running downloads abort
+
+def _cancel_if_stopping(progress):
+    """yt-dlp progress hook that aborts the download once the main loop has stopped."""
+    if _stop_downloads.is_set():
+        raise yt_dlp.utils.DownloadCancelled()
+
+def _finish_media(download):
+    """Runs a download step and probes the resulting file, returning (file, video_title, duration)."""
+    file, video_title = download()
+    return file, video_title, (probe_duration(file) if file else None)
+
+def start_download(pool, download):
+    """Runs download() on `pool` (returning a Future of (file, video_title, duration)), or right away without a pool."""
+    if pool is None:
+        return download()
+    return pool.submit(_finish_media, download)
 
 # 🔹 YouTube Audio Download Function
-def download_audio(youtube_url, cookies=None, auto_redownload=False):
+def download_audio(youtube_url, cookies=None, auto_redownload=False, pool=None):
     """
     Downloads audio from YouTube using yt-dlp with --extract-audio.
     First, it checks if an audio file already exists (using the video title).
@@ -247,7 +490,7 @@ def download_audio(youtube_url, cookies=None, auto_redownload=False):
         metadata_options['cookiefile'] = os.path.abspath(cookies)  # ✅ Use cookies when extracting metadata
 
     # 🔹 Fetch metadata using yt-dlp
-    with yt_dlp.YoutubeDL(metadata_options) as ydl:
+    with metadata_ydl("youtube", cookies, metadata_options) as ydl:  # ✅ Reused per thread when no cookies are set
         try:
             info_dict = ydl.extract_info(youtube_url, download=False)
             video_title = info_dict.get("title", None)
@@ -270,7 +513,7 @@ def download_audio(youtube_url, cookies=None, auto_redownload=False):
 
     # ✅ Step 1: Check log file BEFORE looking for the audio file.
     if processing_batch:
-        processed_farts, processed_burps = log_precheck_results.get(video_id, {"farts": False, "burps": False}).values()
+        processed_farts, processed_burps = log_precheck_results.get(video_id, (False, False))
     else:
         processed_farts, processed_burps = check_log(youtube_url)  # ✅ Restore check for single URLs
 
@@ -280,16 +523,9 @@ def download_audio(youtube_url, cookies=None, auto_redownload=False):
         if existing_file:
             print(f"✅ Found existing audio file: {existing_file}")
     else:
-        existing_file = None
-        if video_id:
-            for ext in possible_extensions:
-                for file in os.listdir("."):
-                    if video_id in file and file.endswith(ext):
-                        existing_file = file
-                        print(f"✅ Found existing audio file: {existing_file}")
-                        break
-                if existing_file:
-                    break  # ✅ Exit loop once a match is found
+        existing_file = find_existing_file(video_id, possible_extensions)
+        if existing_file:
+            print(f"✅ Found existing audio file: {existing_file}")
 
     # ✅ Step 2.1: Handle potential duplicate file (exists but not logged)
     if existing_file and not (processed_farts or processed_burps):  # ✅ File exists but wasn't logged
@@ -299,7 +535,7 @@ def download_audio(youtube_url, cookies=None, auto_redownload=False):
             return existing_file, video_title
 
         print(f"⚠️ A file for this video already exists: {existing_file}")
-        user_input = input("Do you want to use the existing file? (Y/N/A for Apply 'Y' to All): ").strip().lower()
+        user_input = input(f"Do you want to use the existing file for '{video_title}'? (Y/N/A for Apply 'Y' to All): ").strip().lower()
 
         if user_input == 'a':  # ✅ Apply "Use Existing" to all
             use_existing_all = True
@@ -326,21 +562,21 @@ def download_audio(youtube_url, cookies=None, auto_redownload=False):
             if processed_burps:
                 focus_message.append("burps")
             focus_text = " and ".join(focus_message)
-        
+    
             # ✅ If "Skip All" was selected earlier, automatically skip
             if skip_all:
                 print("⏭️ Skipping this video due to 'Skip All' selection.")
                 #skipped_videos += 1  # ✅ Count videos skipped due to user choice
                 return None, None
-            
+        
             # ✅ Ensure `user_input` is always defined to prevent reference errors
             user_input = None
-            
+        
             # ✅ Ask user if they want to re-run inference
-            if processing_batch and args.files == urls:
+            if processing_batch and batch_rerun:
                 print("🔄 Skipping redundant warnings since batch re-run was selected.")
             else:
-                warning_message = f"⚠️ This video has already been processed for {focus_text}.\n"
+                warning_message = f"⚠️ '{video_title}' ({youtube_url}) has already been processed for {focus_text}.\n"
                 if processing_batch:
                     user_input = input(warning_message + "Do you want to run inference again? (Y/N/A for Apply 'N' to All): ").strip().lower()
                 else:
@@ -370,7 +606,7 @@ def download_audio(youtube_url, cookies=None, auto_redownload=False):
             print("🔄 Automatically re-downloading missing file (selected 'A' for all).")
         else:            
             user_input = input(
-                f"⚠️ This video has already been processed for {focus_text}, but the audio file is missing.\n"
+                f"⚠️ '{video_title}' ({youtube_url}) has already been processed for {focus_text}, but the audio file is missing.\n"
                 "Do you want to re-download it? (Y/N): "
             ).strip().lower()
             if user_input != 'y':
@@ -383,33 +619,41 @@ def download_audio(youtube_url, cookies=None, auto_redownload=False):
                     sys.exit(1)
 
     # Proceed to download if we get here.
-    options = {
-        'format': 'bestaudio[ext=m4a]/bestaudio',        'outtmpl': '%(title)s [%(id)s].%(ext)s',        'quiet': False,
-        'concurrent_fragment_downloads': 20,
-        'n_threads': 16,                      
-        'throttled_rate': 'inf',
-        'http_chunk_size': 10485760               
-    }
-    if cookies:
-        options['cookiefile'] = os.path.abspath(cookies)
+    # ✅ Only the download itself runs on the pool; the checks and prompts above run on the main thread
+    def download():
+        global new_videos
+        options = {
+            'format': 'bestaudio[ext=m4a]/bestaudio',        'outtmpl': '%(title)s [%(id)s].%(ext)s',        'quiet': False,
+            'concurrent_fragment_downloads': 20,
+            'n_threads': 16,                      
+            'throttled_rate': 'inf',
+            'http_chunk_size': 10485760,
+            'noprogress': True,  # ✅ Concurrent downloads' progress bars would garble the console
+            'progress_hooks': [_cancel_if_stopping]
+        }
+        if cookies:
+            options['cookiefile'] = os.path.abspath(cookies)
     
-    with yt_dlp.YoutubeDL(options) as ydl:
-        info_dict = ydl.extract_info(youtube_url, download=True)
-        file_name = ydl.prepare_filename(info_dict)
-        # ✅ Extract base filename correctly (remove only the last extension)
-        base_name = os.path.splitext(file_name)[0]  # Removes the last extension (e.g., ".webm", ".m4a")
-
-        # ✅ Check for expected file extensions
-        for ext in possible_extensions:
-            expected_file = f"{base_name}{ext}"  # Append extension correctly
-            if os.path.exists(expected_file):
-                print(f"✅ Audio downloaded & converted: {expected_file}")
-                new_videos += 1  # ✅ Count newly downloaded and processed videos
-                return expected_file, video_title
-
-        raise RuntimeError("❌ Failed to find the downloaded audio file.")
-
-def download_tiktok(tiktok_url, cookies=None):
+        with yt_dlp.YoutubeDL(options) as ydl:
+            info_dict = ydl.extract_info(youtube_url, download=True)
+            file_name = ydl.prepare_filename(info_dict)
+            # ✅ Extract base filename correctly (remove only the last extension)
+            base_name = os.path.splitext(file_name)[0]  # Removes the last extension (e.g., ".webm", ".m4a")
+
+            # ✅ Check for expected file extensions
+            for ext in possible_extensions:
+                expected_file = f"{base_name}{ext}"  # Append extension correctly
+                if os.path.exists(expected_file):
+                    print(f"✅ Audio downloaded & converted: {expected_file}")
+                    with _batch_lock:
+                        new_videos += 1  # ✅ Count newly downloaded and processed videos
+                    return expected_file, video_title
+
+            raise RuntimeError("❌ Failed to find the downloaded audio file.")
+
+    return start_download(pool, download)
+
+def download_tiktok(tiktok_url, cookies=None, pool=None):
     """Downloads TikTok video and extracts audio for inference."""
     print(f"🎵 Checking if TikTok video already exists: {tiktok_url}")
 
@@ -423,7 +667,7 @@ def download_tiktok(tiktok_url, cookies=None):
     if cookies:
         metadata_options['cookiefile'] = os.path.abspath(cookies) # ✅ Use cookies when extracting metadata
 
-    with yt_dlp.YoutubeDL(metadata_options) as ydl:
+    with metadata_ydl("tiktok", cookies, metadata_options) as ydl:  # ✅ Reused per thread when no cookies are set
         try:
             info_dict = ydl.extract_info(tiktok_url, download=False)
             video_title = info_dict.get("title", "Unknown TikTok Video")
@@ -437,41 +681,57 @@ def download_tiktok(tiktok_url, cookies=None):
             return None, None  # ✅ Skip this video and continue
 
     # Check if file already exists
-    existing_file = None
-    for ext in possible_extensions:
-        for file in os.listdir("."):
-            if video_id in file and file.endswith(ext):
-                existing_file = file
-                print(f"✅ Found existing TikTok file: {existing_file}")
-                break
-        if existing_file:
-            break
+    existing_file = find_existing_file(video_id, possible_extensions)
+    if existing_file:
+        print(f"✅ Found existing TikTok file: {existing_file}")
 
     if existing_file:
         return existing_file, video_title  # Use existing file without re-downloading
 
-    # Download TikTok video
-    download_options = {
-        'format': 'mp4/bestaudio/best',
-        'outtmpl': f"%(title)s [%(id)s].mp4",
-        'quiet': False
-    }
-
-    if cookies:
-        download_options['cookiefile'] = os.path.abspath(cookies)  # ✅ Use cookies when downloading
+    # ✅ Only the download itself runs on the pool; the checks and prompts above run on the main thread
+    def download():
+        # Download TikTok video
+        download_options = {
+            'format': 'mp4/bestaudio/best',
+            'outtmpl': f"%(title)s [%(id)s].mp4",
+            'quiet': False,
+            'noprogress': True,  # ✅ Concurrent downloads' progress bars would garble the console
+            'progress_hooks': [_cancel_if_stopping]
+        }
+
+        if cookies:
+            download_options['cookiefile'] = os.path.abspath(cookies)  # ✅ Use cookies when downloading
         
-    with yt_dlp.YoutubeDL(download_options) as ydl:
-        try:
-            info_dict = ydl.extract_info(tiktok_url, download=True)
-            file_name = ydl.prepare_filename(info_dict)
-            return file_name, video_title
-        except Exception as e:
-            print(f"❌ Failed to download TikTok video. Error: {e}")
-            return None, None
+        with yt_dlp.YoutubeDL(download_options) as ydl:
+            try:
+                info_dict = ydl.extract_info(tiktok_url, download=True)
+                file_name = ydl.prepare_filename(info_dict)
+                return file_name, video_title
+            except Exception as e:
+                print(f"❌ Failed to download TikTok video. Error: {e}")
+                return None, None
+
+    return start_download(pool, download)
+
+def fetch_media(url, kind, pool, cookies=None, auto_redownload=False):
+    """Checks (and prompts for) a URL on the calling thread and returns a Future of (file, video_title, duration) from `pool`."""
+    if kind == "youtube":
+        result = download_audio(url, cookies, auto_redownload, pool)
+    elif kind == "tiktok":
+        result = download_tiktok(url, cookies, pool)
+    elif kind == "twitch":
+        result = download_twitch(url, cookies, pool)
+    elif kind == "soop":
+        result = download_soop(url, cookies, pool)
+    else:
+        result = url, url  # ✅ Use the filename as the title for local files
+    if isinstance(result, Future):
+        return result
+    return pool.submit(_finish_media, lambda: result)  # ✅ Nothing to download, only the duration probe runs on the pool
 
 def log_failed_tiktok(tiktok_url):
     """Logs failed TikTok URLs to a file for retrying later."""
-    match = re.search(r"tiktok\.com/@([^/?]+)", tiktok_url)
+    match = _TIKTOK_ACCOUNT_RE.search(tiktok_url)
     account_name = match.group(1) if match else "Unknown"
     failed_log_file = f"TikTokFailedURLs - @{account_name}.txt"
 
@@ -480,7 +740,7 @@ def log_failed_tiktok(tiktok_url):
     
     print(f"💾 Logged failed URL to {failed_log_file}")
 
-def download_twitch(twitch_url, cookies=None):
+def download_twitch(twitch_url, cookies=None, pool=None):
     """Downloads Twitch VOD or clip and extracts audio for inference."""
     print(f"🎵 Checking if Twitch video already exists: {twitch_url}")
 
@@ -494,7 +754,7 @@ def download_twitch(twitch_url, cookies=None):
     if cookies:
         metadata_options['cookiefile'] = os.path.abspath(cookies)
 
-    with yt_dlp.YoutubeDL(metadata_options) as ydl:
+    with metadata_ydl("twitch", cookies, metadata_options) as ydl:  # ✅ Reused per thread when no cookies are set
         try:
             info_dict = ydl.extract_info(twitch_url, download=False)
             video_title = info_dict.get("title", "Unknown Twitch Video")
@@ -504,58 +764,50 @@ def download_twitch(twitch_url, cookies=None):
             return None, None
 
     # Verifica se o arquivo já existe
-    existing_file = None
-    for ext in possible_extensions:
-        for file in os.listdir("."):
-            if video_id in file and file.endswith(ext):
-                existing_file = file
-                print(f"✅ Found existing Twitch file: {existing_file}")
-                break
-        if existing_file:
-            break
+    existing_file = find_existing_file(video_id, possible_extensions)
+    if existing_file:
+        print(f"✅ Found existing Twitch file: {existing_file}")
 
     if existing_file:
         return existing_file, video_title
 
-    # Opções de download com conversão para .opus
-    options = {
-        'format': 'bestaudio[ext=m4a]/bestaudio',        'outtmpl': '%(title)s [%(id)s].%(ext)s',  # 🛠️ deixa o yt-dlp decidir a extensão        'quiet': False,
-        'concurrent_fragment_downloads': 20,
-        'n_threads': 16,                      
-        'throttled_rate': 'inf',
-        'http_chunk_size': 10485760           
-    }
+    # ✅ Only the download itself runs on the pool; the checks and prompts above run on the main thread
+    def download():
+        # Opções de download com conversão para .opus
+        options = {
+            'format': 'bestaudio[ext=m4a]/bestaudio',        'outtmpl': '%(title)s [%(id)s].%(ext)s',  # 🛠️ deixa o yt-dlp decidir a extensão        'quiet': False,
+            'concurrent_fragment_downloads': 20,
+            'n_threads': 16,                      
+            'throttled_rate': 'inf',
+            'http_chunk_size': 10485760,
+            'noprogress': True,  # ✅ Concurrent downloads' progress bars would garble the console
+            'progress_hooks': [_cancel_if_stopping]
+        }
+
+        if cookies:
+            options['cookiefile'] = os.path.abspath(cookies)
+
+        with yt_dlp.YoutubeDL(options) as ydl:
+            try:
+                info_dict = ydl.extract_info(twitch_url, download=True)
+        # Tenta encontrar o .opus real usando o ID
+                output_id = info_dict.get("id")
+                expected_file = find_existing_file(output_id, possible_extensions)
 
-    if cookies:
-        options['cookiefile'] = os.path.abspath(cookies)
-
-    with yt_dlp.YoutubeDL(options) as ydl:
-        try:
-            info_dict = ydl.extract_info(twitch_url, download=True)
-    # Tenta encontrar o .opus real usando o ID
-            output_id = info_dict.get("id")
-            expected_file = None
-
-            for ext in possible_extensions:
-                for file in os.listdir("."):
-                    if output_id in file and file.endswith(ext):
-                        expected_file = file
-                        break
                 if expected_file:
-                     break
+                    print(f"✅ Audio downloaded & converted: {expected_file}")
+                    return expected_file, video_title
+                else:
+                    raise RuntimeError("❌ Failed to locate downloaded Twitch audio file.")
 
-            if expected_file:
-                print(f"✅ Audio downloaded & converted: {expected_file}")
-                return expected_file, video_title
-            else:
-                raise RuntimeError("❌ Failed to locate downloaded Twitch audio file.")
 
+            except Exception as e:
+                print(f"❌ Error during Twitch video download: {e}")
+                return None, None
 
-        except Exception as e:
-            print(f"❌ Error during Twitch video download: {e}")
-            return None, None
-        
-def download_soop(soop_url, cookies=None):
+    return start_download(pool, download)
+
+def download_soop(soop_url, cookies=None, pool=None):
     """Downloads Soop.live (AfreecaTV) VOD and extracts audio for inference."""
     print(f"🎵 Checking if Soop/Afreeca video already exists: {soop_url}")
 
@@ -569,7 +821,7 @@ def download_soop(soop_url, cookies=None):
     if cookies:
         metadata_options['cookiefile'] = os.path.abspath(cookies)
 
-    with yt_dlp.YoutubeDL(metadata_options) as ydl:
+    with metadata_ydl("soop", cookies, metadata_options) as ydl:  # ✅ Reused per thread when no cookies are set
         try:
             info_dict = ydl.extract_info(soop_url, download=False)
             video_title = info_dict.get("title", "Unknown Soop Video")
@@ -579,79 +831,187 @@ def download_soop(soop_url, cookies=None):
             return None, None
 
     # Verifica se o arquivo já existe
-    existing_file = None
-    for ext in possible_extensions:
-        for file in os.listdir("."):
-            if video_id in file and file.endswith(ext):
-                existing_file = file
-                print(f"✅ Found existing Soop file: {existing_file}")
-                return existing_file, video_title
-
-    # Opções para baixar e converter áudio
-    options = {
-        'format': 'bestaudio[ext=m4a]/bestaudio',        'outtmpl': '%(title)s [%(id)s].%(ext)s',        'quiet': False,
-        'concurrent_fragment_downloads': 20,
-        'n_threads': 16,                      
-        'throttled_rate': 'inf',
-        'http_chunk_size': 10485760   
-    }
-
-    if cookies:
-        options['cookiefile'] = os.path.abspath(cookies)
-
-    with yt_dlp.YoutubeDL(options) as ydl:
-        try:
-            info_dict = ydl.extract_info(soop_url, download=True)
-            if 'entries' in info_dict:
-                info_dict = info_dict['entries'][0]  # 🔹 SoopLive entrega playlists às vezes, pega só o primeiro item
-            file_name = ydl.prepare_filename(info_dict)
-            base_name = os.path.splitext(file_name)[0]
+    existing_file = find_existing_file(video_id, possible_extensions)
+    if existing_file:
+        print(f"✅ Found existing Soop file: {existing_file}")
+        return existing_file, video_title
 
-            for ext in possible_extensions:
-                expected_file = f"{base_name}.{ext}"
-                if os.path.exists(expected_file):
-                    print(f"✅ Audio downloaded & converted: {expected_file}")
-                    return expected_file, video_title
+    # ✅ Only the download itself runs on the pool; the checks and prompts above run on the main thread
+    def download():
+        # Opções para baixar e converter áudio
+        options = {
+            'format': 'bestaudio[ext=m4a]/bestaudio',        'outtmpl': '%(title)s [%(id)s].%(ext)s',        'quiet': False,
+            'concurrent_fragment_downloads': 20,
+            'n_threads': 16,                      
+            'throttled_rate': 'inf',
+            'http_chunk_size': 10485760,
+            'noprogress': True,  # ✅ Concurrent downloads' progress bars would garble the console
+            'progress_hooks': [_cancel_if_stopping]
+        }
+
+        if cookies:
+            options['cookiefile'] = os.path.abspath(cookies)
+
+        with yt_dlp.YoutubeDL(options) as ydl:
+            try:
+                info_dict = ydl.extract_info(soop_url, download=True)
+                if 'entries' in info_dict:
+                    info_dict = info_dict['entries'][0]  # 🔹 SoopLive entrega playlists às vezes, pega só o primeiro item
+                file_name = ydl.prepare_filename(info_dict)
+                base_name = os.path.splitext(file_name)[0]
+
+                for ext in possible_extensions:
+                    expected_file = f"{base_name}.{ext}"
+                    if os.path.exists(expected_file):
+                        print(f"✅ Audio downloaded & converted: {expected_file}")
+                        return expected_file, video_title
+
+                raise RuntimeError("❌ Failed to locate downloaded Soop audio file.")
+
+            except Exception as e:
+                print(f"❌ Error during Soop video download: {e}")
+                return None, None
 
-            raise RuntimeError("❌ Failed to locate downloaded Soop audio file.")
+    return start_download(pool, download)
 
-        except Exception as e:
-            print(f"❌ Error during Soop video download: {e}")
-            return None, None
-    
-def chunker(seq: np.ndarray, size: int):
-    return (seq[pos:pos + size] for pos in range(0, len(seq), size))
+def probe_duration(file: str) -> Optional[float]:
+    """Returns the media duration in seconds using ffprobe, or None if it can't be determined."""
+    cmd = ['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0', file]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        return float(result.stdout.strip())
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+def pcm_cache_path(file: str, sr: int) -> str:
+    """Returns the path of the decoded-audio cache kept next to a media file (raw mono s16le at `sr`)."""
+    return f"{file}.sr{sr}.pcm"
+
+def iter_pcm(file: str, sr: int, read_samples: int, cache: bool = False):
+    """Decodes an audio file with FFmpeg and yields int16 PCM arrays of up to read_samples samples (cache=True reuses a memmapped decode)."""
+    cached = pcm_cache_path(file, sr)
+    if cache and os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(file):
+        pcm = np.memmap(cached, dtype=np.int16, mode='r')  # ✅ Pages are read on demand, nothing is decoded
+        for start in range(0, pcm.size, read_samples):
+            yield pcm[start:start + read_samples]
+        return
 
-# 🔹 Audio Processing Function (FFmpeg + Chunk Processing)
-def load_audio(file: str, sr: int, chunk_size: int = 960000):
-    """Loads an audio file using FFmpeg and processes it in chunks to avoid MemoryError."""
     cmd = [
         'ffmpeg', '-i', file, '-f', 's16le', '-ac', '1', '-acodec',
         'pcm_s16le', '-ar', str(sr), '-'
     ]
 
     try:
-        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=chunk_size)
-        buffer = []
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=read_samples * 2)
+    except (OSError, subprocess.SubprocessError) as e:
+        raise RuntimeError(f"❌ Failed to load audio: {str(e)}")
+
+    partial = cached + ".part"
+    cache_fh = open(partial, "wb") if cache else None
+    try:
         while True:
-            chunk = process.stdout.read(chunk_size * 2)  # Read in small chunks
+            chunk = process.stdout.read(read_samples * 2)  # ✅ Pipe reads return full blocks until EOF
             if not chunk:
                 break
 
-            audio_chunk = np.frombuffer(chunk, np.int16).astype(np.float32) / (2.0**15)
-            buffer.append(audio_chunk)
-
+            raw = np.frombuffer(chunk, np.int16, count=len(chunk) // 2)  # ✅ Ignore a dangling odd byte at EOF
+            if not raw.size:
+                break
+            if cache_fh is not None:
+                cache_fh.write(raw)
+            yield raw
+
+        # ✅ Only a complete, successful decode becomes the cache
+        if cache_fh is not None and cache_fh.tell() and process.wait() == 0:
+            cache_fh.close()
+            os.replace(partial, cached)
+    finally:
+        if process.poll() is None:
+            process.kill()  # ✅ Consumer stopped early, don't leave FFmpeg running
         process.stdout.close()
         process.wait()
+        if cache_fh is not None:
+            cache_fh.close()
+            if os.path.exists(partial):
+                os.remove(partial)
+
+# 🔹 Audio Processing Function (FFmpeg + Chunk Processing)
+def iter_audio_blocks(file: str, sr: int, batch_samples: int = 960000, windows: int = 1, ring: Optional[List[np.ndarray]] = None, cache: bool = False):
+    """Decodes an audio file with FFmpeg and yields (block, n_samples) pairs, where block is a float32
+    [rows, batch_samples] array of up to `windows` consecutive windows and n_samples the real audio it holds.
+
+    Blocks are produced straight from the pipe, so the whole file is never held in memory. The final
+    window is zero-padded to batch_samples so every block can be fed to the model as-is.
+    If `ring` is given, blocks are written into those preallocated [windows, batch_samples] buffers in
+    turn, so a block is only valid until len(ring) newer blocks have been produced.
+    `cache` is passed to iter_pcm to reuse (or write) the decoded-audio cache.
+    """
+    pcm = iter_pcm(file, sr, batch_samples * windows, cache)
+    try:
+        decoded_any = False
+        blocks = 0
+        for raw in pcm:
+            rows = -(-raw.size // batch_samples)
+            if ring:
+                block = ring[blocks % len(ring)][:rows]  # ✅ Leading rows of a C-contiguous buffer stay contiguous
+                blocks += 1
+            else:
+                block = np.empty((rows, batch_samples), dtype=np.float32)
+            flat = block.reshape(-1)  # ✅ Contiguous, so this is a view: samples land directly in their window rows
+            np.multiply(raw, _INV_32768, out=flat[:raw.size], dtype=np.float32, casting='unsafe')  # ✅ Convert + scale in one pass
+            flat[raw.size:] = 0
+            decoded_any = True
+            yield block, raw.size
 
         # 🔴 Adicione este check aqui:
-        if not buffer:
+        if not decoded_any:
             raise RuntimeError(f"⚠️ No audio could be extracted from the file: {file}")
+    finally:
+        pcm.close()  # ✅ Stops FFmpeg right away if the consumer stopped early
+
+def prefetch_chunks(chunks, maxsize: int = 4):
+    """Runs a chunk generator on a background thread so decoding overlaps with inference."""
+    chunk_queue = queue.Queue(maxsize=maxsize)  # ✅ Bounded, so at most `maxsize` items (e.g. [ort_batch, batch_size] blocks) are held in memory
+    stop = threading.Event()
+    done = object()
+    errors = []
+
+    def put(item):
+        """Blocks until the item is queued, giving up if the consumer has stopped."""
+        while not stop.is_set():
+            try:
+                chunk_queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    break
+        except Exception as e:
+            errors.append(e)
+        finally:
+            chunks.close()
+            put(done)
 
-    except subprocess.SubprocessError as e:
-        raise RuntimeError(f"❌ Failed to load audio: {str(e)}")
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
 
-    return np.concatenate(buffer)
+    try:
+        while True:
+            chunk = chunk_queue.get()
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        stop.set()
+        thread.join()
+
+    if errors:
+        raise errors[0]
 
 def seconds_to_hms(seconds):
     """Converts seconds into HH:MM:SS format."""
@@ -661,47 +1021,66 @@ def seconds_to_hms(seconds):
 
 
 def subsample(frame: np.ndarray, scale_factor: int) -> np.ndarray:
-    """Reduces frame data to improve efficiency by downsampling."""
-    subframe = frame[:len(frame) - (len(frame) % scale_factor)].reshape(-1, scale_factor)
-    subframe_mean = subframe.max(axis=1)
-
-    subsample = subframe_mean
-
-    if len(frame) % scale_factor != 0:
-        residual_frame = frame[len(frame) - (len(frame) % scale_factor):]
-        residual_mean = residual_frame.max()
-        subsample = np.append(subsample, residual_mean)
-
-    return subsample
-
-def print_results(scores: np.ndarray, precision: int, offset: int, top: np.ndarray, threshold: int):
-    """Prints detected sounds in HH:MM:SS + confidence percentage format."""
-    for i in top:
-        score = int(scores[i] * 100)
-        
+    """Reduces frame data to improve efficiency by downsampling (with Numba, _find_events_nb does this instead)."""
+    # ✅ One pass over the frame: reduceat handles the ragged tail bin natively (no reshape copy, no np.append)
+    edges = np.arange(0, len(frame), scale_factor)
+    return np.maximum.reduceat(frame, edges)
+
+# ✅ Compiled subsample + threshold in one pass: returns (bin index, score) of every bin scoring >= threshold
+if njit is not None:
+    @njit(cache=True)
+    def _find_events_nb(focus, scale_factor, threshold):
+        n = focus.shape[0]
+        bins = (n + scale_factor - 1) // scale_factor
+        indices = np.empty(bins, dtype=np.int64)
+        scores = np.empty(bins, dtype=focus.dtype)
+        k = 0
+        for i in range(bins):
+            start = i * scale_factor
+            end = min(start + scale_factor, n)
+            m = focus[start]
+            for j in range(start + 1, end):
+                v = focus[j]
+                if v > m or v != v:  # ✅ v != v picks up NaN, so NaN propagates like np.maximum
+                    m = v
+            if m >= threshold:
+                indices[k] = i
+                scores[k] = m
+                k += 1
+        return indices[:k], scores[:k]
+
+try:
+    from _fastpath import seconds_to_hms, subsample  # ✅ Compiled helpers, if _fastpath.pyx has been built
+except ImportError:
+    pass  # Pure Python/NumPy versions above are used
+
+def format_results(scores: np.ndarray, precision: int, offset: int, top: np.ndarray, threshold: int) -> List[str]:
+    """Formats detected sounds in HH:MM:SS + confidence percentage format (scores[k] is the score of bin top[k])."""
+    lines = []
+    percents = (scores * np.float32(100)).astype(np.int64)  # ✅ Scale in float32 like the original per-element math (0.29 -> 29%, not 28%)
+    for i, score in zip(top.tolist(), percents.tolist()):
         if score >= threshold:
-            tqdm.write(
+            lines.append(
                 seconds_to_hms(i * precision / 100 + offset) + ' ' +
                 f'{score}%')
-        else:
-            break
-
-def print_timestamps(framewise_output: np.ndarray, precision: int, threshold: int, focus_idx: int, offset: int):
-    """Extracts and formats timestamps for detected sounds."""
-    focus = framewise_output[:, focus_idx]
-    subsampled_scores = subsample(focus, precision)
-    top_indices = np.argpartition(subsampled_scores, -len(subsampled_scores))[-len(subsampled_scores):]
-    sorted_confidence = np.sort(top_indices)
+    return lines
 
+def format_timestamps(focus: np.ndarray, precision: int, threshold: int, offset: int) -> List[str]:
+    """Extracts and formats timestamps for detected sounds from one framewise score column, returning one line per detection."""
     # ✅ Fix: Ensure threshold is applied correctly
-    actual_threshold = threshold / 100  # Convert user threshold to match score format
-    filtered_indices = [i for i in sorted_confidence if subsampled_scores[i] >= actual_threshold]
+    actual_threshold = np.float32(threshold) * np.float32(0.01)  # Convert user threshold to match score format
+    if njit is not None:
+        filtered_indices, filtered_scores = _find_events_nb(focus, precision, actual_threshold)
+    else:
+        subsampled_scores = subsample(focus, precision)
+        filtered_indices = np.flatnonzero(subsampled_scores >= actual_threshold)  # ✅ Already in time order
+        filtered_scores = subsampled_scores[filtered_indices]
 
     # ✅ Ensure at least one valid result exists
-    if not filtered_indices:
-        return  # If no timestamps pass the threshold, don't print anything
+    if not filtered_indices.size:
+        return []  # If no timestamps pass the threshold, there is nothing to print
     
-    print_results(subsampled_scores, precision, offset, filtered_indices, threshold)
+    return format_results(filtered_scores, precision, offset, filtered_indices, threshold)
 
 check_dependencies()  # ✅ Ensure all dependencies are available before execution
 
@@ -717,6 +1096,7 @@ while rerun_main:
         parser.add_argument('--precision', metavar='p', nargs='?', type=int, default=1 * 100, help='Precision in ms')
         parser.add_argument('--threshold', metavar='t', nargs='?', type=int, default=20, help='Confidence threshold')
         parser.add_argument('--batch_size', metavar='b', nargs='?', type=int, default=960000, help='Batch size')
+        parser.add_argument('--ort_batch', metavar='k', type=int, default=4, help='Audio windows per ONNX inference call')
 
         focus_group = parser.add_mutually_exclusive_group()
         focus_group.add_argument('--focus_idx', metavar='i', type=int, help='Manually specify focus_idx')
@@ -724,21 +1104,85 @@ while rerun_main:
         focus_group.add_argument('-B', action='store_const', const=58, dest='focus_idx', help='Set focus_idx to 58 (BURPS)')
 
         parser.add_argument('--model', metavar='m', type=str, help='Path to ONNX model', default="bdetectionmodel_05_01_23.onnx")
+        parser.add_argument('--concurrency', metavar='k', type=int, default=4, help='Videos downloaded in parallel when processing a batch')
+        parser.add_argument('--device', type=str, choices=['cpu', 'cuda'], default=None, help='Inference device (default: CUDA if available, otherwise CPU)')
+        parser.add_argument('--fp32', action='store_true', help='Run the original model instead of its int8 quantized copy')
+        parser.add_argument('--pcm_cache', action='store_true', help='Keep decoded audio next to each file so re-runs skip decoding')
         parser.add_argument('--cookies', metavar='c', type=str, help='Path to cookies file (for age-restricted videos)', default=None)
 
         args = parser.parse_args()
 
-        model = onnx.load(args.model)
+        # ✅ CUDA first (when available/requested), CPU as fallback
+        cuda_available = "CUDAExecutionProvider" in onnxruntime.get_available_providers()
+        if args.device == 'cuda' and not cuda_available:
+            print("⚠️ CUDA requested but onnxruntime-gpu is not installed (pip install onnxruntime-gpu). Falling back to CPU.")
+        use_cuda = args.device != 'cpu' and cuda_available
+        if use_cuda:
+            providers = [
+                ('CUDAExecutionProvider', {'cudnn_conv_algo_search': 'HEURISTIC', 'do_copy_in_default_stream': True}),
+                'CPUExecutionProvider'
+            ]
+        else:
+            providers = ['CPUExecutionProvider']
+
+        # ✅ On CPU, prefer an int8 copy of the model (the same file prepare_model.py writes), created on first run and
+        #    whenever the source model is newer. CUDA always runs the original: dynamic int8 ops fall back to the CPU there.
+        quantized_model = os.path.splitext(args.model)[0] + ".int8.onnx"
+        quantized_fresh = os.path.exists(quantized_model) and os.path.getmtime(quantized_model) >= os.path.getmtime(args.model)
+        if not use_cuda and not args.fp32 and not quantized_fresh:
+            from onnxruntime.quantization import quantize_dynamic, QuantType
+            print(f"🔹 Quantizing {args.model} to int8 (first run only)...")
+            try:
+                quantize_dynamic(args.model, quantized_model, weight_type=QuantType.QInt8)
+                quantized_fresh = True
+            except Exception as e:
+                print(f"⚠️ Quantization failed, using the original model. Error: {e}")
+        model_path = quantized_model if quantized_fresh and not use_cuda and not args.fp32 else args.model
+        if model_path != args.model:
+            print(f"⚡ Using quantized model: {model_path}")
+
         sess_options = onnxruntime.SessionOptions()
+        sess_options.execution_mode = onnxruntime.ExecutionMode.ORT_SEQUENTIAL
+        sess_options.intra_op_num_threads = max(1, (os.cpu_count() or 2) // 2)  # ✅ One thread per physical core
+        sess_options.enable_cpu_mem_arena = True
+        sess_options.add_session_config_entry("session.intra_op.allow_spinning", "1")
+
+        # ✅ Bake the window length into the graph so ORT can pick shape-specialized kernels
+        input_dims = onnx.load(model_path, load_external_data=False).graph.input[0].type.tensor_type.shape.dim
+        free_dim = input_dims[1].dim_param if len(input_dims) > 1 else ""
+        if free_dim:
+            sess_options.add_free_dimension_override_by_name(free_dim, args.batch_size)
+
+        # ✅ Optimize the graph once and reuse it on later runs (never overwrite the source model).
+        #    Fused graphs are provider-, shape- and ORT-version-specific, and a newer source model invalidates the cached one.
+        #    Only the portable (EXTENDED) passes are cached; hardware-specific layout passes re-run on every load.
+        optimized_path = f"{os.path.splitext(model_path)[0]}.{'cuda' if use_cuda else 'cpu'}.b{args.batch_size}.ort{onnxruntime.__version__}.opt.onnx"
+        if not (os.path.exists(optimized_path) and os.path.getmtime(optimized_path) >= os.path.getmtime(model_path)):
+            save_options = onnxruntime.SessionOptions()
+            save_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_EXTENDED
+            save_options.optimized_model_filepath = optimized_path
+            if free_dim:
+                save_options.add_free_dimension_override_by_name(free_dim, args.batch_size)
+            onnxruntime.InferenceSession(model_path, save_options, providers=providers)  # ✅ Only created to write the cached graph
         sess_options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
-        sess_options.optimized_model_filepath = args.model
 
         ort_session = onnxruntime.InferenceSession(
-            args.model,
+            optimized_path,
             sess_options,
-            providers=onnxruntime.get_available_providers()
+            providers=providers
         )
 
+        # ✅ Only stack windows into one call if the model's batch axis is dynamic
+        batch_dim = ort_session.get_inputs()[0].shape[0]
+        ort_batch = max(1, args.ort_batch) if not isinstance(batch_dim, int) else 1
+
+        # ✅ Decoded blocks are bound by pointer instead of converting a new tensor on every run
+        io_binding = ort_session.io_binding()
+
+        # ✅ Decode into buffers allocated once for the whole run. A block can be in use by inference, waiting in the
+        #    prefetch queue or being filled by the decoder, so the ring needs PREFETCH_BLOCKS + 2 buffers to never overlap.
+        block_ring = [np.empty((ort_batch, args.batch_size), dtype=np.float32) for _ in range(PREFETCH_BLOCKS + 2)]
+
         # ✅ Initialize summary counters
         total_videos = 0
         skipped_videos = 0
@@ -747,21 +1191,16 @@ while rerun_main:
         videos_inferenced = 0  # ✅ Track videos that ran inference
 
         first_file = args.files[0]
+        batch_rerun = False
         
-        # Detect platform type
-        is_youtube = "youtube.com" in first_file or "youtu.be" in first_file
-        is_tiktok_video = "tiktok.com" in first_file and "/video/" in first_file
-        is_tiktok_channel = "tiktok.com/@" in first_file
-        is_twitch_video = "twitch.tv/videos/" in first_file
-        is_twitch_clip = "clips.twitch.tv/" in first_file
-        is_soop = "soop.live" in first_file or "afreecatv.com" in first_file
-
-        if is_tiktok_video:
+        source = classify_source(first_file)  # ✅ One regex pass decides how the target is expanded
+
+        if source == "tiktok_video":
             print("📜 Detected TikTok video. Processing as a single TikTok video...")
-        elif is_tiktok_channel:
+        elif source == "tiktok_channel":
             print(f"📜 Detected TikTok account: {first_file}. Checking for existing TikTok URLs file...")
 
-            match = re.search(r"tiktok\.com/@([^/?]+)", first_file)
+            match = _TIKTOK_ACCOUNT_RE.search(first_file)
             account_name = match.group(1) if match else "Unknown"
             tiktok_urls_file = f"TikTokURLs - @{account_name}.txt"
 
@@ -779,12 +1218,11 @@ while rerun_main:
                 print("❌ No videos found in this TikTok account.")
                 sys.exit(1)
         # ✅ Extract URLs in .txt file and Pre-Check Log
-        elif first_file.endswith('.txt'):
+        elif source == "txt":
             print(f"📜 Detected .txt file: {first_file}. Extracting YouTube URLs...")
-            process_logged_missing = None  # ✅ Ensure it’s always defined
             with open(first_file, "r", encoding="utf-8") as f:
                 urls = [
-                    line.strip().replace("/shorts/", "/watch?v=")
+                    to_watch_url(line.strip())
                     for line in f.readlines()
                     if "youtube.com/watch?" in line or "youtu.be/" in line or "youtube.com/shorts/" in line
                 ]
@@ -793,441 +1231,157 @@ while rerun_main:
                 print("❌ No valid YouTube URLs found in the text file. Exiting.")
                 sys.exit(1)
 
-            # ✅ Pre-check log for these URLs
-            log_precheck_results = precheck_log_for_urls(urls)
-            
-            # ✅ Pre-check file existence
-            file_precheck_results = precheck_files_for_urls(urls)
-
-            # ✅ Step 3: Show Pre-Processing Summary BEFORE processing
-            # ✅ Find IDs that are in log but missing from file checks
-            logged_but_missing_files = sum(1 for vid in log_precheck_results if vid not in file_precheck_results)
-            # ✅ Find IDs that exist as files but have no corresponding log entry
-            existing_but_not_logged = sum(1 for vid in file_precheck_results if vid not in log_precheck_results)
-            videos_to_process = max(len(urls) - len(log_precheck_results), 0)  # Ensure non-negative
-
-            # ✅ Filter URLs to process only required videos
-            urls_to_process = []
-
-            print("\n📊 Summary Before Processing:")
-            print(f"   🎥 Total videos extracted: {len(urls)}")
-            print(f"   🔍 Videos already processed (found in log): {len(log_precheck_results)}")
-            print(f"   ✅ Existing files found: {len(file_precheck_results)}")
-            print(f"   🔴 Logged videos with missing files: {logged_but_missing_files}")  # NEW
-            print(f"   🟡 Existing files not found in log: {existing_but_not_logged}")  # NEW
-            print(f"   🔄 Videos requiring download & processing: {videos_to_process}")
-
-            # ✅ If ALL videos are logged AND ALL files exist, prompt for re-inference instead of re-processing
-            if len(log_precheck_results) == len(urls) and len(file_precheck_results) == len(urls):
-                print("✅ No new videos require downloading, but all extracted videos are fully processed and still exist.")
-                
-                user_input = input("Do you want to re-run inference for all videos? (Y/N): ").strip().lower()
-                
-                if user_input == 'y':  # ✅ Re-run all videos
-                    print("🔄 Re-running inference for all extracted videos.")
-                    urls_to_process = urls  # ✅ Reset file list to process all
-                else:  # ✅ Exit normally
-                    print("⏹️ Process terminated by user.")
-                    sys.exit(0)
-
-            # ✅ Ask user if they want to continue if mismatches exist
-            elif len(log_precheck_results) > 0 and (logged_but_missing_files > 0 or existing_but_not_logged > 0 or videos_to_process != len(urls)):
-                print("\n⚠️ Warning: There are inconsistencies between the log and existing files.")
-                user_decision = input("Would you like to:\n"
-                                      "(Y) Re-download only missing files (Logged videos with missing files)\n"
-                                      "(N) Skip missing files that have been inferenced and process only new ones (Videos requiring download & processing) \n"
-                                      "(A) Process all videos (Total videos extracted)\n"
-                                      "(E) Exit script\n"
-                                      "Enter choice (Y/N/A/E): ").strip().lower()
-
-                if user_decision == 'n':
-                    print("⏭️ Skipping re-downloading missing files and only processing new videos.")
-                    process_logged_missing = False
-                    
-                    # ✅ Check if there are actually any new videos to process; exit if none exist
-                    if videos_to_process == 0:
-                        print("✅ No new videos requiring download. Exiting script.")
-                        sys.exit(0)  # ✅ Prevents unnecessary processing
-                elif user_decision == 'y':
-                    print("🔄 Re-downloading only missing files.")
-                    process_logged_missing = True
-                    
-                    # ✅ If no videos are logged, exit!
-                    if len(log_precheck_results) == 0 or logged_but_missing_files == 0:
-                        print("✅ No new videos requiring download. Exiting script.")
-                        sys.exit(0)  # ✅ Prevents unnecessary processing
-                elif user_decision == 'a':
-                    print("🔄 Processing all extracted videos (new + missing + existing).")
-                    process_logged_missing = "all"
-                elif user_decision == 'e':
-                    print("⏹️ Process terminated by user.")
-                    exit()
-                else:
-                    print("⚠️ Invalid input. Defaulting to skipping re-download.")
-                    process_logged_missing = False
-                    
-            for url in urls:
-                video_id = url.split("watch?v=")[-1]
-                log_entry_exists = video_id in log_precheck_results
-                file_exists = video_id in file_precheck_results
-
-                # ✅ If 'A' (All) was chosen, process all videos
-                if process_logged_missing == "all":
-                    urls_to_process.append(url)
-
-                # ✅ If 'Y' (Re-download missing files), process only logged but missing files
-                elif process_logged_missing == True and log_entry_exists and not file_exists and logged_but_missing_files > 0:
-                    urls_to_process.append(url)
-
-                # ✅ If 'N' (Skip missing files), process only new unlogged videos
-                elif not process_logged_missing and not log_entry_exists:
-                    urls_to_process.append(url)
-
-                # ✅ If files exist but aren't logged, ask user (Handled later in existing checks)
-                elif not log_entry_exists and file_exists:
-                    urls_to_process.append(url)
-            
-            print(f"\n🎯 Filtered videos to process: {len(urls_to_process)} out of {len(urls)}")
+            urls_to_process, process_logged_missing = resolve_urls_to_process(urls)
             args.files = urls_to_process  # ✅ Update file list to process only necessary videos
+            batch_rerun = len(urls_to_process) == len(urls)  # ✅ Every extracted video selected again (checked once, not per video)
 
             print(f"📜 Processing {len(urls_to_process)} videos from batch file...")
 
-        elif "youtube.com/playlist?" in first_file or "&list=" in first_file:
+        elif source == "playlist":
             print(f"📜 Detected YouTube playlist: {first_file}. Extracting video URLs...")
             urls = extract_playlist_urls(first_file, args.cookies)
-            # ✅ Convert Shorts URLs in extracted playlist videos
-            urls = [
-                url.replace("/shorts/", "/watch?v=") if "youtube.com/shorts/" in url else url
-                for url in urls
-            ]
-            process_logged_missing = None  # ✅ Ensure it’s always defined
+            urls = [to_watch_url(url) for url in urls]  # ✅ Convert Shorts URLs in extracted playlist videos
 
             if not urls:
                 print("❌ No videos found in the playlist. Exiting.")
                 sys.exit(1)
 
-            # ✅ Pre-check log for these URLs
-            log_precheck_results = precheck_log_for_urls(urls)
-            
-            # ✅ Pre-check file existence
-            file_precheck_results = precheck_files_for_urls(urls)
-
-            # ✅ Step 3: Show Pre-Processing Summary BEFORE processing
-            # ✅ Find IDs that are in log but missing from file checks
-            logged_but_missing_files = sum(1 for vid in log_precheck_results if vid not in file_precheck_results)
-            # ✅ Find IDs that exist as files but have no corresponding log entry
-            existing_but_not_logged = sum(1 for vid in file_precheck_results if vid not in log_precheck_results)
-            videos_to_process = max(len(urls) - len(log_precheck_results), 0)  # Ensure non-negative
-            
-            # ✅ Filter URLs to process only required videos
-            urls_to_process = []
-            
-            print("\n📊 Summary Before Processing:")
-            print(f"   🎥 Total videos extracted: {len(urls)}")
-            print(f"   🔍 Videos already processed (found in log): {len(log_precheck_results)}")
-            print(f"   ✅ Existing files found: {len(file_precheck_results)}")
-            print(f"   🔴 Logged videos with missing files: {logged_but_missing_files}")  # NEW
-            print(f"   🟡 Existing files not found in log: {existing_but_not_logged}")  # NEW
-            print(f"   🔄 Videos requiring download & processing: {videos_to_process}")
-            
-            #print("\n🟢 Debugging Summary Calculation:")
-            #print(f"🔍 Total Extracted Videos: {len(urls)}")
-            #print(f"📜 Video IDs in Playlist: {[url.split('watch?v=')[-1] for url in urls]}")  
-
-            #print(f"\n🟢 Comparing Log Entries to Extracted Playlist:")
-            #for vid in log_precheck_results:
-                #if vid not in [url.split("watch?v=")[-1] for url in urls]:
-                    #print(f"❌ Log Entry {vid} is NOT in extracted playlist!")
-
-            #print(f"\n🟢 Comparing Extracted Playlist to Log Entries:")
-            #for url in urls:
-                #vid = url.split("watch?v=")[-1]
-                #if vid not in log_precheck_results:
-                    #print(f"❌ Extracted Video {vid} is NOT in Log!")                                          
-
-            # ✅ If ALL videos are logged AND ALL files exist, prompt for re-inference instead of re-processing
-            if len(log_precheck_results) == len(urls) and len(file_precheck_results) == len(urls):
-                print("✅ No new videos require downloading, but all extracted videos are fully processed and still exist.")
-                
-                user_input = input("Do you want to re-run inference for all videos? (Y/N): ").strip().lower()
-                
-                if user_input == 'y':  # ✅ Re-run all videos
-                    print("🔄 Re-running inference for all extracted videos.")
-                    urls_to_process = urls  # ✅ Reset file list to process all
-                else:  # ✅ Exit normally
-                    print("⏹️ Process terminated by user.")
-                    sys.exit(0)
-
-            # ✅ Ask user if they want to continue if mismatches exist
-            elif len(log_precheck_results) > 0 and (logged_but_missing_files > 0 or existing_but_not_logged > 0 or videos_to_process != len(urls)):
-                print("\n⚠️ Warning: There are inconsistencies between the log and existing files.")
-                user_decision = input("Would you like to:\n"
-                                      "(Y) Re-download only missing files (Logged videos with missing files)\n"
-                                      "(N) Skip missing files that have been inferenced and process only new ones (Videos requiring download & processing) \n"
-                                      "(A) Process all videos (Total videos extracted)\n"
-                                      "(E) Exit script\n"
-                                      "Enter choice (Y/N/A/E): ").strip().lower()
-
-                if user_decision == 'n':
-                    print("⏭️ Skipping re-downloading missing files and only processing new videos.")
-                    process_logged_missing = False
-                    
-                    # ✅ Check if there are actually any new videos to process; exit if none exist
-                    if videos_to_process == 0:
-                        print("✅ No new videos requiring download. Exiting script.")
-                        sys.exit(0)  # ✅ Prevents unnecessary processing
-                elif user_decision == 'y':
-                    print("🔄 Re-downloading only missing files.")
-                    process_logged_missing = True
-                    
-                    # ✅ If no videos are logged, exit!
-                    if len(log_precheck_results) == 0 or logged_but_missing_files == 0:
-                        print("✅ No new videos requiring download. Exiting script.")
-                        sys.exit(0)  # ✅ Prevents unnecessary processing
-                elif user_decision == 'a':
-                    print("🔄 Processing all extracted videos (new + missing + existing).")
-                    process_logged_missing = "all"
-                elif user_decision == 'e':
-                    print("⏹️ Process terminated by user.")
-                    exit()
-                else:
-                    print("⚠️ Invalid input. Defaulting to skipping re-download.")
-                    process_logged_missing = False
-
-            for url in urls:
-                video_id = url.split("watch?v=")[-1]
-                log_entry_exists = video_id in log_precheck_results
-                file_exists = video_id in file_precheck_results
-
-                # ✅ If 'A' (All) was chosen, process all videos
-                if process_logged_missing == "all":
-                    urls_to_process.append(url)
-
-                # ✅ If 'Y' (Re-download missing files), process only logged but missing files
-                elif process_logged_missing == True and log_entry_exists and not file_exists and logged_but_missing_files > 0:
-                    urls_to_process.append(url)
-
-                # ✅ If 'N' (Skip missing files), process only new unlogged videos
-                elif not process_logged_missing and not log_entry_exists:
-                    urls_to_process.append(url)
-
-                # ✅ If files exist but aren't logged, ask user (Handled later in existing checks)
-                elif not log_entry_exists and file_exists:
-                    urls_to_process.append(url)
-            
-            print(f"\n🎯 Filtered videos to process: {len(urls_to_process)} out of {len(urls)}")
+            urls_to_process, process_logged_missing = resolve_urls_to_process(urls)
             args.files = urls_to_process  # ✅ Update file list to process only necessary videos
+            batch_rerun = len(urls_to_process) == len(urls)  # ✅ Every extracted video selected again (checked once, not per video)
 
             print(f"📜 Processing {len(urls_to_process)} videos from playlist...")
 
-        elif "youtube.com/@".lower() in first_file or "youtube.com/c/".lower() in first_file or \
-            "youtube.com/user/".lower() in first_file or "youtube.com/channel/".lower() in first_file:
+        elif source == "channel":
 
             print(f"📜 Detected YouTube channel: {first_file}. Extracting video URLs...")
-            urls = extract_channel_videos(first_file, args.cookies)
-            # ✅ Convert Shorts URLs in extracted playlist videos
-            urls = [
-                url.replace("/shorts/", "/watch?v=") if "youtube.com/shorts/" in url else url
-                for url in urls
-            ]
-            process_logged_missing = None  # ✅ Ensure it’s always defined
+            urls = extract_channel_videos(first_file, args.cookies)  # ✅ Shorts URLs are already converted during extraction
 
             if not urls:
                 print("❌ No videos found in the channel. Exiting.")
                 sys.exit(1)
 
-            # ✅ Step 1: Pre-check log for these URLs
-            log_precheck_results = precheck_log_for_urls(urls)
-            
-            # ✅ Step 2: Pre-check file existence
-            file_precheck_results = precheck_files_for_urls(urls)
-          
-            # ✅ Step 3: Show Pre-Processing Summary BEFORE processing
-            # ✅ Find IDs that are in log but missing from file checks
-            logged_but_missing_files = sum(1 for vid in log_precheck_results if vid not in file_precheck_results)
-            # ✅ Find IDs that exist as files but have no corresponding log entry
-            existing_but_not_logged = sum(1 for vid in file_precheck_results if vid not in log_precheck_results)
-            videos_to_process = max(len(urls) - len(log_precheck_results), 0)  # Ensure non-negative
-
-            # ✅ Filter URLs to process only required videos
-            urls_to_process = []
-
-            print("\n📊 Summary Before Processing:")
-            print(f"   🎥 Total videos extracted: {len(urls)}")
-            print(f"   🔍 Videos already processed (found in log): {len(log_precheck_results)}")
-            print(f"   ✅ Existing files found: {len(file_precheck_results)}")
-            print(f"   🔴 Logged videos with missing files: {logged_but_missing_files}")  # NEW
-            print(f"   🟡 Existing files not found in log: {existing_but_not_logged}")  # NEW
-            print(f"   🔄 Videos requiring download & processing: {videos_to_process}")
-
-            # ✅ If ALL videos are logged AND ALL files exist, prompt for re-inference instead of re-processing
-            if len(log_precheck_results) == len(urls) and len(file_precheck_results) == len(urls):
-                print("✅ No new videos require downloading, but all extracted videos are fully processed and still exist.")
-                
-                user_input = input("Do you want to re-run inference for all videos? (Y/N): ").strip().lower()
-                
-                if user_input == 'y':  # ✅ Re-run all videos
-                    print("🔄 Re-running inference for all extracted videos.")
-                    urls_to_process = urls  # ✅ Reset file list to process all
-                else:  # ✅ Exit normally
-                    print("⏹️ Process terminated by user.")
-                    sys.exit(0)
-
-            # ✅ Ask user if they want to continue if mismatches exist
-            elif len(log_precheck_results) > 0 and (logged_but_missing_files > 0 or existing_but_not_logged > 0 or videos_to_process != len(urls)):
-                print("\n⚠️ Warning: There are inconsistencies between the log and existing files.")
-                user_decision = input("Would you like to:\n"
-                                      "(Y) Re-download only missing files (Logged videos with missing files)\n"
-                                      "(N) Skip missing files that have been inferenced and process only new ones (Videos requiring download & processing) \n"
-                                      "(A) Process all videos (Total videos extracted)\n"
-                                      "(E) Exit script\n"
-                                      "Enter choice (Y/N/A/E): ").strip().lower()
-
-                if user_decision == 'n':
-                    print("⏭️ Skipping re-downloading missing files and only processing new videos.")
-                    process_logged_missing = False
-                    
-                    # ✅ Check if there are actually any new videos to process; exit if none exist
-                    if videos_to_process == 0:
-                        print("✅ No new videos requiring download. Exiting script.")
-                        sys.exit(0)  # ✅ Prevents unnecessary processing
-                elif user_decision == 'y':
-                    print("🔄 Re-downloading only missing files.")
-                    process_logged_missing = True
-                    
-                    # ✅ If no videos are logged, exit!
-                    if len(log_precheck_results) == 0 or logged_but_missing_files == 0:
-                        print("✅ No new videos requiring download. Exiting script.")
-                        sys.exit(0)  # ✅ Prevents unnecessary processing
-                elif user_decision == 'a':
-                    print("🔄 Processing all extracted videos (new + missing + existing).")
-                    process_logged_missing = "all"
-                elif user_decision == 'e':
-                    print("⏹️ Process terminated by user.")
-                    exit()
-                else:
-                    print("⚠️ Invalid input. Defaulting to skipping re-download.")
-                    process_logged_missing = False
-
-            for url in urls:
-                video_id = url.split("watch?v=")[-1]
-                log_entry_exists = video_id in log_precheck_results
-                file_exists = video_id in file_precheck_results
-
-                # ✅ If 'A' (All) was chosen, process all videos
-                if process_logged_missing == "all":
-                    urls_to_process.append(url)
-
-                # ✅ If 'Y' (Re-download missing files), process only logged but missing files
-                elif process_logged_missing == True and log_entry_exists and not file_exists and logged_but_missing_files > 0:
-                    urls_to_process.append(url)
-
-                # ✅ If 'N' (Skip missing files), process only new unlogged videos
-                elif not process_logged_missing and not log_entry_exists:
-                    urls_to_process.append(url)
-
-                # ✅ If files exist but aren't logged, ask user (Handled later in existing checks)
-                elif not log_entry_exists and file_exists:
-                    urls_to_process.append(url)
-            
-            print(f"\n🎯 Filtered videos to process: {len(urls_to_process)} out of {len(urls)}")
+            urls_to_process, process_logged_missing = resolve_urls_to_process(urls)
             args.files = urls_to_process  # ✅ Update file list to process only necessary videos
+            batch_rerun = len(urls_to_process) == len(urls)  # ✅ Every extracted video selected again (checked once, not per video)
 
             print(f"📜 Processing {len(urls_to_process)} videos from Channel...")
 
         # ✅ Detect if processing a batch (.txt, Playlist, YouTube Channel or TikTok Account)
-        processing_batch = (
-            first_file.endswith(".txt") or 
-            "youtube.com/playlist" in first_file or 
-            "youtube.com/@".lower() in first_file or 
-            "youtube.com/c/".lower() in first_file or 
-            "youtube.com/user/".lower() in first_file or 
-            "youtube.com/channel/".lower() in first_file or
-            ("tiktok.com/@" in first_file and "/video/" not in first_file)  # ✅ Ensure only TikTok channels
-        )
+        processing_batch = source in _BATCH_SOURCES
         
         skip_all = False  # ✅ Track if user chose to skip all remaining videos
 
-        # ✅ Process each URL one by one
-        for i, file in enumerate(args.files):
-            print(f"\n📌 Processing video {i + 1} out of {len(args.files)} in list to be processed")  # NEW MESSAGE
-            
-            total_videos += 1  # ✅ Count every video processed (regardless of result)
-            original_youtube_url = file.replace("/shorts/", "/watch?v=")
-            video_id = original_youtube_url.split("watch?v=")[-1]
+        auto_redownload = (process_logged_missing == "all") if 'process_logged_missing' in locals() else False
 
-            auto_redownload = (process_logged_missing == "all") if 'process_logged_missing' in locals() else False
-            if "youtube.com" in file or "youtu.be" in file:
-                file, video_title = download_audio(file, args.cookies, auto_redownload)
+        # ✅ Downloads run ahead on a thread pool (up to --concurrency videos) while the current video is inferred.
+        #    Metadata lookups, file/log checks and prompts stay on this thread, between videos.
+        concurrency = max(1, args.concurrency) if processing_batch else 1
+        downloader = ThreadPoolExecutor(max_workers=concurrency)
+        _stop_downloads.clear()
+        pending_downloads = deque()
+        # ✅ Playlists and .txt batches can repeat a video; two workers must never download the same file at once
+        args.files = list(dict.fromkeys(args.files))
+        url_kinds = [(url, classify_url(url)) for url in args.files]  # ✅ Classify every URL once, up front
+        urls_to_fetch = iter(url_kinds)
 
-                # ✅ If user chose to skip, move to the next video
-                if file is None:
-                    skipped_videos += 1  # ✅ Count videos skipped due to user choice
-                    continue
-            elif "tiktok.com" in file and "/video/" in file:
-                file, video_title = download_tiktok(file, args.cookies)
+        def submit_next_download():
+            url, kind = next(urls_to_fetch, (None, None))
+            if url is not None:
+                pending_downloads.append((url, kind, fetch_media(url, kind, downloader, args.cookies, auto_redownload)))
 
-            elif "twitch.tv/videos/" in file or "clips.twitch.tv/" in file:
-                file, video_title = download_twitch(file, args.cookies)
+        try:
+            for _ in range(concurrency):
+                submit_next_download()
 
-            elif "soop.live" in file or "vod.sooplive.co.kr" in file:
-                file, video_title = download_soop(file, args.cookies)
+            # ✅ Process each URL one by one
+            for i in range(len(args.files)):
+                file, kind, download = pending_downloads.popleft()
+                submit_next_download()  # ✅ Any prompt for the next video is shown before this video's output starts
 
-                # ✅ If download failed, skip to the next video
-                if file is None:
-                    skipped_videos += 1  # ✅ Count videos skipped due to download failure
-                    continue             
-            else:
-                video_title = file  # ✅ Use the filename as the title for local files
+                print(f"\n📌 Processing video {i + 1} out of {len(args.files)} in list to be processed")  # NEW MESSAGE
+
+                total_videos += 1  # ✅ Count every video processed (regardless of result)
+                original_youtube_url = to_watch_url(file)
+                video_id = extract_video_id(original_youtube_url)
 
-                # ✅ Skip only if processing a batch, otherwise exit normally
+                file, video_title, duration = download.result()
+
+                # ✅ If user chose to skip (or the download failed), move to the next video
                 if file is None:
-                    if processing_batch:
-                        continue  # ✅ Move to the next video in batch
-                    else:
-                        skipped_videos += 1
-                        sys.exit(1)  # ✅ Exit for single URL or filename
-
-            print(f"🎥 Video Title: {video_title}")
-            print(f"🔍 Starting inference for: {file}")
-            print("🔹 Loading audio...")
-            audio = load_audio(file, sr=sample_rate)
-            print("✅ Audio loaded successfully!")
-            
-            total_chunks = len(audio) // args.batch_size  # Standard batch calculation
+                    skipped_videos += 1
+                    continue
 
-            # ✅ Only add an extra batch if the remaining audio is at least 1 full sample frame
-            remaining_audio = len(audio) % args.batch_size
-            if remaining_audio > 0 and remaining_audio >= sample_rate:
-                total_chunks += 1
+                print(f"🎥 Video Title: {video_title}")
+                print(f"🔍 Starting inference for: {file}")
+                print("🔹 Streaming audio...")
 
-            if not hasattr(args, 'focus_idx') or args.focus_idx is None:
-                focus_idx_values = [60, 58]
-            else:
-                focus_idx_values = [int(args.focus_idx)]
-                print(f"🔍 User-specified focus_idx: {args.focus_idx}")
+                # ✅ A trailing window is only inferred if it holds at least 1 second of audio (or is a full window)
+                min_window = min(sample_rate, args.batch_size)
+                total_chunks = None
+                if duration:
+                    total_chunks = -(-(int(duration * sample_rate) - min_window + 1) // args.batch_size)  # ✅ Windows of >= min_window samples
+
+                if not hasattr(args, 'focus_idx') or args.focus_idx is None:
+                    focus_idx_values = [60, 58]
+                else:
+                    focus_idx_values = [int(args.focus_idx)]
+                    print(f"🔍 User-specified focus_idx: {args.focus_idx}")
 
-            for focus_idx in focus_idx_values:
+                # ✅ Run the model once per window and keep only the focus columns; both focus_idx values
+                #    read the same output, so the audio is never decoded or inferred twice
+                focus_columns = []  # ([len(focus_idx_values), frames] scores, offset in seconds) per window
                 offset = 0
-                header = "🟣 FARTS" if focus_idx == 60 else "🟢 BURPS"
-                print("\n" + stylize(header, colored.attr('bold')))
-                
-                for idx, chunk in enumerate(tqdm(chunker(audio, args.batch_size), total=total_chunks, leave=False)):
-                    if idx >= total_chunks:
-                        break  # ✅ Forcefully stop at total_chunks
-                    chunk = chunk.reshape(1, -1)
-                    ort_inputs = {'input': chunk}
-                    framewise_output = ort_session.run(['output'], ort_inputs)[0]
-                    print_timestamps(framewise_output[0], args.precision, args.threshold, focus_idx, offset)
-                    offset += len(chunk[0]) / sample_rate
-                    
-                    del chunk
 
-                log_inference(original_youtube_url, focus_idx, video_title)
-            del audio
-            videos_inferenced += 1  # ✅ Count videos where inference was run
-            gc.collect()  # ✅ Force Python to free up unused memory
-            print("✅ Inference completed for this file!")
+                # ✅ FFmpeg decodes [ort_batch, batch_size] blocks on a background thread while this thread runs inference
+                chunks = prefetch_chunks(iter_audio_blocks(file, sample_rate, args.batch_size, ort_batch, block_ring, args.pcm_cache), maxsize=PREFETCH_BLOCKS)
+
+                try:
+                    with tqdm(total=total_chunks, leave=False) as progress:
+                        for ort_inputs, n_samples in chunks:
+                            tail = n_samples - (len(ort_inputs) - 1) * args.batch_size  # Real samples in the last row
+                            if tail < min_window:
+                                ort_inputs = ort_inputs[:-1]  # ✅ Trailing fragment shorter than 1 second is skipped
+                                n_samples -= tail
+                                if not len(ort_inputs):
+                                    break
+
+                            # ✅ One run for up to ort_batch windows, bound without copying
+                            io_binding.bind_input('input', 'cpu', 0, np.float32, ort_inputs.shape, ort_inputs.ctypes.data)
+                            io_binding.bind_output('output', 'cpu')  # ✅ Rebound each run: the last block may have fewer rows
+                            ort_session.run_with_iobinding(io_binding)
+                            framewise_output = io_binding.copy_outputs_to_cpu()[0]
+                            for row, chunk_output in enumerate(framewise_output):
+                                chunk_samples = min(args.batch_size, n_samples - row * args.batch_size)
+                                if chunk_samples < args.batch_size:  # ✅ Drop frames that only cover the zero padding
+                                    chunk_output = chunk_output[:int(np.ceil(len(chunk_output) * chunk_samples / args.batch_size))]
+                                # ✅ Fancy indexing the transposed view copies each focus column into its own contiguous row
+                                focus_columns.append((chunk_output.T[focus_idx_values], offset))
+                                offset += chunk_samples / sample_rate
+                            progress.update(len(ort_inputs))
+                finally:
+                    chunks.close()  # ✅ Stop the decoder thread even if inference failed or we left the loop early
+                # ✅ Drop the last batch (chunk_output is a view that keeps the whole output tensor alive)
+                ort_inputs = framewise_output = chunk_output = None
+
+                for column, focus_idx in enumerate(focus_idx_values):
+                    header = "🟣 FARTS" if focus_idx == 60 else "🟢 BURPS"
+                    print("\n" + stylize(header, colored.attr('bold')))
+                    lines = []
+                    for scores, chunk_offset in focus_columns:
+                        lines.extend(format_timestamps(scores[column], args.precision, args.threshold, chunk_offset))
+                    if lines:
+                        sys.stdout.write("\n".join(lines) + "\n")  # ✅ One write per focus group instead of one per timestamp
+
+                log_inference(original_youtube_url, focus_idx_values, video_title, kind)
+                videos_inferenced += 1  # ✅ Count videos where inference was run
+                print("✅ Inference completed for this file!")
+        finally:
+            # ✅ After an early exit, queued downloads are cancelled and running ones abort at their next progress update.
+            #    The interpreter still joins the pool's threads on exit, so a download finishing its post-processing
+            #    (e.g. FFmpeg audio extraction) can delay exit until that step ends.
+            _stop_downloads.set()
+            downloader.shutdown(wait=False, cancel_futures=True)
 
         if processing_batch:
             print("\n📊 Summary Report:")
@@ -1236,8 +1390,8 @@ while rerun_main:
             print(f"   ✅ Previously existing files used: {existing_files_used}") #This counter only refers to videos that were not downloaded during the script run
             print(f"   🔄 Newly downloaded videos: {new_videos}")
             # ✅ Check for failed TikTok URLs
-            if "tiktok.com/@" in first_file and not "/video/" in first_file:
-                match = re.search(r"tiktok\.com/@([^/?]+)", first_file)
+            if source == "tiktok_channel":
+                match = _TIKTOK_ACCOUNT_RE.search(first_file)
                 account_name = match.group(1) if match else "Unknown"
                 failed_log_file = f"TikTokFailedURLs - @{account_name}.txt"
                 urls_file = f"TikTokURLs - @{account_name}.txt"